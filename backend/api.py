@@ -0,0 +1,134 @@
+"""Authenticated REST endpoints for client management."""
+
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from . import crud, notify, schemas, security, wg_status_cache, wg_utils
+from .config import settings
+from .database import get_db
+
+router = APIRouter(
+    prefix="/api", dependencies=[Depends(security.get_current_user)]
+)
+
+
+def _next_free_address(db):
+    """Pick the next /32 in the server subnet after existing clients."""
+    taken = {c.address for c in crud.get_clients(db, limit=10000)}
+    base = settings.WG_SERVER_ADDRESS.split("/")[0].rsplit(".", 1)[0]
+    for host in range(2, 255):
+        candidate = f"{base}.{host}/32"
+        if candidate not in taken:
+            return candidate
+    raise HTTPException(status_code=507, detail="Address pool exhausted")
+
+
+def _persist_config_later(db):
+    """Render the current config and schedule its debounced write.
+
+    The running interface was already updated incrementally via
+    ``wg set``; only the on-disk file needs to catch up.
+    """
+    config = wg_utils.generate_wireguard_config(
+        crud.get_active_clients(db), settings.server_private_key
+    )
+    wg_utils.schedule_config_write(config)
+
+
+def _base_client(db_client):
+    # model_construct skips per-field validation: the rows come straight
+    # from our own schema, so there is nothing to validate, and
+    # construction cost dominates the enrichment loop at large N.
+    return schemas.Client.model_construct(
+        id=db_client.id,
+        name=db_client.name,
+        public_key=db_client.public_key,
+        address=db_client.address,
+        allowed_ips=db_client.allowed_ips,
+        is_active=db_client.is_active,
+        created_at=db_client.created_at,
+    )
+
+
+def enrich_clients(db_clients, live_statuses):
+    """Merge live peer status from the wg map into client schema objects.
+
+    Also used by the websocket broadcast loop in :mod:`backend.main`.
+    Offline clients (the common case on a mostly-idle fleet) only pay
+    the base construction; when the live map is empty the per-row
+    lookups are skipped entirely.
+    """
+    if not live_statuses:
+        return [_base_client(db_client) for db_client in db_clients]
+    # One clock read and two cutoffs for the whole batch; handshakes
+    # stay in unix seconds, so the per-row check is an int compare and
+    # only returned live clients pay a datetime conversion.
+    now = time.time()
+    conn_cutoff = now - 180
+    stream_cutoff = now - 60
+    enriched = []
+    for db_client in db_clients:
+        data = _base_client(db_client)
+        live = live_statuses.get(db_client.public_key)
+        if live is not None:
+            handshake = live.latest_handshake
+            data.endpoint = live.endpoint
+            data.latest_handshake_at = (
+                datetime.utcfromtimestamp(handshake) if handshake else None
+            )
+            data.transfer_rx = live.transfer_rx
+            data.transfer_tx = live.transfer_tx
+            data.is_connected = handshake >= conn_cutoff
+            data.is_streaming = (
+                live.transfer_rx > 1_000_000 and handshake >= stream_cutoff
+            )
+        enriched.append(data)
+    return enriched
+
+
+@router.post("/clients", response_model=schemas.Client)
+def create_client(client: schemas.ClientCreate, db=Depends(get_db)):
+    if crud.get_client_by_name(db, client.name) is not None:
+        raise HTTPException(status_code=409, detail="Name already in use")
+    private_key, public_key = wg_utils.generate_keys()
+    preshared_key = wg_utils.generate_preshared_key()
+    db_client = crud.create_client(
+        db,
+        client,
+        private_key=private_key,
+        public_key=public_key,
+        preshared_key=preshared_key,
+        address=_next_free_address(db),
+    )
+    # Incremental O(1) kernel update instead of a full regen + syncconf
+    # over all peers; bulk provisioning stays flat per client.
+    allowed = wg_utils.combined_allowed_for(db_client.allowed_ips)
+    wg_utils.add_peer_live(public_key, preshared_key, allowed)
+    _persist_config_later(db)
+    notify.request_broadcast()
+    return db_client
+
+
+@router.get("/clients", response_model=list[schemas.Client])
+def read_clients_with_status(
+    skip: int = 0, limit: int = 100, db=Depends(get_db)
+):
+    db_clients = crud.get_clients_lean(db, skip=skip, limit=limit)
+    # The broadcast task keeps this map fresh; no subprocess per request.
+    live_statuses = wg_status_cache.get_cached()
+    return enrich_clients(db_clients, live_statuses)
+
+
+@router.delete("/clients/{client_id}")
+def delete_client(client_id: int, db=Depends(get_db)):
+    db_client = crud.get_client(db, client_id)
+    if db_client is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    public_key = db_client.public_key
+    crud.delete_client(db, client_id)
+    wg_utils.remove_peer_live(public_key)
+    _persist_config_later(db)
+    notify.request_broadcast()
+    return {"ok": True}
@@ -0,0 +1,53 @@
+"""Runtime settings for the WireGuard manager backend.
+
+Everything is environment-driven with development defaults so the app
+boots on a laptop without a config file; production deployments override
+via the environment.
+"""
+
+import functools
+import os
+
+
+class Settings:
+    SECRET_KEY = os.environ.get("SECRET_KEY", "change-me-in-production")
+    ACCESS_TOKEN_EXPIRE_MINUTES = int(
+        os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    )
+    ADMIN_USERNAME = os.environ.get("ADMIN_USERNAME", "admin")
+    #: bcrypt hash of the admin password; empty disables password login.
+    ADMIN_PASSWORD_HASH = os.environ.get("ADMIN_PASSWORD_HASH", "")
+
+    DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./wg_manager.db")
+
+    WG_INTERFACE = os.environ.get("WG_INTERFACE", "wg0")
+    WG_CONF_PATH = os.environ.get("WG_CONF_PATH", "/etc/wireguard/wg0.conf")
+    WG_SERVER_ADDRESS = os.environ.get("WG_SERVER_ADDRESS", "10.8.0.1/24")
+    WG_SERVER_LISTEN_PORT = int(
+        os.environ.get("WG_SERVER_LISTEN_PORT", "51820")
+    )
+    WG_SERVER_PRIVATE_KEY_PATH = os.environ.get(
+        "WG_SERVER_PRIVATE_KEY_PATH", "/etc/wireguard/server_private.key"
+    )
+    WG_SERVER_ENDPOINT = os.environ.get(
+        "WG_SERVER_ENDPOINT", "vpn.example.com:51820"
+    )
+    #: Relative to the backend package directory; extra CIDRs routed
+    #: through every peer (YouTube ranges for the streaming use case).
+    YOUTUBE_IPS_FILE = os.environ.get("YOUTUBE_IPS_FILE", "youtube_ips.txt")
+
+    @functools.cached_property
+    def server_private_key(self):
+        """The server key, read from disk once and held in memory.
+
+        Key rotation is handled by :meth:`reload_server_private_key`
+        (wired to SIGHUP in main), not by re-reading per request.
+        """
+        with open(self.WG_SERVER_PRIVATE_KEY_PATH) as f:
+            return f.read().strip()
+
+    def reload_server_private_key(self):
+        self.__dict__.pop("server_private_key", None)
+
+
+settings = Settings()
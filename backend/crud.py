@@ -0,0 +1,88 @@
+"""Database access helpers."""
+
+from sqlalchemy import select
+
+from . import models, schemas
+
+
+def get_client(db, client_id):
+    return (
+        db.query(models.ClientConfig)
+        .filter(models.ClientConfig.id == client_id)
+        .first()
+    )
+
+
+def get_client_by_name(db, name):
+    return (
+        db.query(models.ClientConfig)
+        .filter(models.ClientConfig.name == name)
+        .first()
+    )
+
+
+def get_clients(db, skip=0, limit=100):
+    return db.query(models.ClientConfig).offset(skip).limit(limit).all()
+
+
+def get_active_clients(db):
+    """Active rows only, filtered by the database, for config rendering."""
+    return (
+        db.query(models.ClientConfig)
+        .filter(models.ClientConfig.is_active.is_(True))
+        .all()
+    )
+
+
+def get_clients_lean(db, skip=0, limit=100):
+    """Column-only rows for read paths.
+
+    Skips ORM identity-map bookkeeping and per-object hydration; returns
+    plain Row tuples with attribute access, which is all the status
+    enrichment loop needs.
+    """
+    return db.execute(
+        select(
+            models.ClientConfig.id,
+            models.ClientConfig.name,
+            models.ClientConfig.public_key,
+            models.ClientConfig.address,
+            models.ClientConfig.allowed_ips,
+            models.ClientConfig.is_active,
+            models.ClientConfig.created_at,
+        )
+        .offset(skip)
+        .limit(limit)
+    ).all()
+
+
+def create_client(
+    db,
+    client: schemas.ClientCreate,
+    *,
+    private_key,
+    public_key,
+    preshared_key,
+    address,
+):
+    db_client = models.ClientConfig(
+        name=client.name,
+        private_key=private_key,
+        public_key=public_key,
+        preshared_key=preshared_key,
+        address=address,
+        allowed_ips=address,
+    )
+    db.add(db_client)
+    db.commit()
+    db.refresh(db_client)
+    return db_client
+
+
+def delete_client(db, client_id):
+    db_client = get_client(db, client_id)
+    if db_client is None:
+        return False
+    db.delete(db_client)
+    db.commit()
+    return True
@@ -0,0 +1,39 @@
+"""SQLAlchemy engine and session plumbing."""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from .config import settings
+
+# SQLite needs check_same_thread off because FastAPI hands sessions
+# across its threadpool; other backends take no connect args.
+_connect_args = (
+    {"check_same_thread": False}
+    if settings.DATABASE_URL.startswith("sqlite")
+    else {}
+)
+
+engine = create_engine(settings.DATABASE_URL, connect_args=_connect_args)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Dedicated autocommit engine for long-lived read-only sessions (the
+# broadcast loop keeps one open across ticks): no transaction
+# accumulates, so the session never needs a rollback between reads.
+read_engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args=_connect_args,
+    isolation_level="AUTOCOMMIT",
+)
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=read_engine
+)
+
+Base = declarative_base()
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,201 @@
+"""FastAPI application: auth, REST router, live-status websocket feed."""
+
+import asyncio
+import contextlib
+import logging
+import signal
+import threading
+
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, WebSocket, status
+from fastapi.security import OAuth2PasswordRequestForm
+from starlette.websockets import WebSocketDisconnect
+
+from . import api, crud, models, notify, schemas, security, wg_status_cache
+from . import wg_utils
+from .config import settings
+from .database import ReadSessionLocal, engine
+
+try:
+    # Optional: with pyroute2 available, rtnetlink events on the wg
+    # interface wake the broadcast loop the moment something changes.
+    from pyroute2 import IPRoute
+except ImportError:
+    IPRoute = None
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="wg-manager")
+app.include_router(api.router)
+
+BROADCAST_INTERVAL = 2.0
+
+# Rows store naive UTC datetimes (datetime.utcnow); OPT_NAIVE_UTC makes
+# orjson emit them as ISO-8601 with the Z suffix entirely in C — no
+# Python-level default=str fallback runs per field.
+_ORJSON_OPTS = orjson.OPT_NAIVE_UTC
+
+
+@app.post("/token", response_model=schemas.Token)
+def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = security.authenticate_user(form_data.username, form_data.password)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = security.create_access_token({"sub": user.username})
+    return {"access_token": token, "token_type": "bearer"}
+
+
+class ConnectionManager:
+    def __init__(self):
+        self.active_connections = []
+
+    async def connect(self, websocket):
+        await websocket.accept()
+        self.active_connections.append(websocket)
+
+    def disconnect(self, websocket):
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+
+    async def broadcast(self, payload: bytes):
+        """Send a pre-serialized payload to every subscriber at once.
+
+        Sends run concurrently, so one slow or dead client costs the
+        slowest RTT rather than the sum of all of them; connections
+        whose send raised are pruned afterwards.
+        """
+        connections = list(self.active_connections)
+        if not connections:
+            return
+        results = await asyncio.gather(
+            *(c.send_bytes(payload) for c in connections),
+            return_exceptions=True,
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.disconnect(connection)
+
+
+manager = ConnectionManager()
+
+
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    await manager.connect(websocket)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        manager.disconnect(websocket)
+
+
+async def broadcast_updates():
+    """Poll peer status, refresh the shared cache, push to subscribers.
+
+    Ticks where nothing changed send nothing: the serialized snapshot is
+    hashed and compared against the previous tick.  When something did
+    change, only the changed/removed clients go out, keyed by public
+    key, so idle subscribers cost no bandwidth.
+    """
+    wake = notify.bind(asyncio.get_running_loop())
+    last_hash = None
+    prev_by_pubkey = {}
+    # One session for the life of the loop instead of a fresh
+    # checkout/checkin every tick; the autocommit engine means no
+    # transaction is left open between reads, and expire_all drops any
+    # stale identity-map state before each query.
+    db = ReadSessionLocal()
+    try:
+        while True:
+            # Every /api/clients read depends on this task refreshing
+            # the status cache, so one bad tick (a locked database, a
+            # failed wg invocation) must log and retry next tick, never
+            # kill the loop.
+            try:
+                # One subprocess per tick, off the event loop; every
+                # HTTP reader of the peer map shares this via
+                # wg_status_cache.
+                statuses = await asyncio.to_thread(
+                    wg_utils.get_peer_statuses
+                )
+                wg_status_cache.publish(statuses)
+                db.expire_all()
+                clients = api.enrich_clients(
+                    crud.get_clients_lean(db, limit=10000), statuses
+                )
+                by_pubkey = {c.public_key: c.model_dump() for c in clients}
+                snapshot = orjson.dumps(
+                    list(by_pubkey.values()), option=_ORJSON_OPTS
+                )
+                digest = hash(snapshot)
+                if digest != last_hash:
+                    last_hash = digest
+                    changed = [
+                        data
+                        for public_key, data in by_pubkey.items()
+                        if prev_by_pubkey.get(public_key) != data
+                    ]
+                    removed = [
+                        public_key
+                        for public_key in prev_by_pubkey
+                        if public_key not in by_pubkey
+                    ]
+                    prev_by_pubkey = by_pubkey
+                    delta = orjson.dumps(
+                        {"changed": changed, "removed": removed},
+                        option=_ORJSON_OPTS,
+                    )
+                    await manager.broadcast(delta)
+            except Exception:  # noqa: BLE001 - logged, loop must survive
+                logger.exception("broadcast tick failed")
+                # The long-lived session may hold failed transaction
+                # state; reset it before the next tick's reads.
+                with contextlib.suppress(Exception):
+                    db.rollback()
+            # Event-driven: a mutation or netlink event wakes us right
+            # away; the timeout is the backstop for handshake/counter
+            # changes that raise no event.
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    wake.wait(), timeout=BROADCAST_INTERVAL
+                )
+            wake.clear()
+    finally:
+        db.close()
+
+
+def _netlink_watcher():
+    """Daemon thread: turn rtnetlink churn into broadcast wakeups.
+
+    Link/address events cover interface and endpoint changes; pure
+    handshake/counter updates raise no rtnetlink message, which is why
+    the broadcast loop keeps its timed backstop.
+    """
+    with IPRoute() as ipr:
+        ipr.bind()
+        while True:
+            for _ in ipr.get():
+                pass
+            notify.request_broadcast()
+
+
+@app.on_event("startup")
+async def startup():
+    models.Base.metadata.create_all(bind=engine)
+    # SIGHUP drops the cached server key so rotation is a signal away;
+    # unavailable on platforms without loop signal handlers (Windows).
+    with contextlib.suppress(NotImplementedError, RuntimeError):
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, settings.reload_server_private_key
+        )
+    # Keep the reference: a bare create_task result can be garbage
+    # collected, silently dropping the feed.
+    app.state.broadcast_task = asyncio.create_task(broadcast_updates())
+    if IPRoute is not None:
+        threading.Thread(
+            target=_netlink_watcher, name="wg-netlink", daemon=True
+        ).start()
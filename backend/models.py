@@ -0,0 +1,24 @@
+"""ORM models."""
+
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
+
+from .database import Base
+
+
+class ClientConfig(Base):
+    __tablename__ = "client_configs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    # Indexed: this is the join key against the live wg peer map.
+    public_key = Column(String, unique=True, index=True, nullable=False)
+    private_key = Column(String, nullable=False)
+    preshared_key = Column(String, nullable=True)
+    #: The peer's tunnel address, e.g. "10.8.0.2/32".
+    address = Column(String, nullable=False)
+    #: AllowedIPs pushed to the server config for this peer.
+    allowed_ips = Column(String, nullable=False, default="10.8.0.2/32")
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,27 @@
+"""Wake channel between state-mutating paths and the broadcast loop.
+
+The broadcast task binds an asyncio.Event here at startup and sleeps on
+it instead of a fixed tick; anything that changes peer state — the REST
+mutation handlers, or the optional netlink watcher in main — calls
+:func:`request_broadcast` to push an update out within milliseconds
+instead of waiting for the next poll.
+"""
+
+import asyncio
+
+_loop = None
+_wake = None
+
+
+def bind(loop):
+    """Create the wake event on the running loop; returns it."""
+    global _loop, _wake
+    _loop = loop
+    _wake = asyncio.Event()
+    return _wake
+
+
+def request_broadcast():
+    """Wake the broadcast loop early; safe to call from any thread."""
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_wake.set)
@@ -0,0 +1,40 @@
+"""Pydantic request/response models."""
+
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ClientCreate(BaseModel):
+    name: str
+
+
+class Client(BaseModel):
+    """A client row, optionally enriched with live peer status."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    public_key: str
+    address: str
+    allowed_ips: str
+    is_active: bool
+    created_at: datetime | None = None
+    # Live fields, populated from the wg peer map when the peer is known
+    # to the kernel; left at defaults for offline clients.
+    endpoint: str | None = None
+    latest_handshake_at: datetime | None = None
+    transfer_rx: int = 0
+    transfer_tx: int = 0
+    is_connected: bool = False
+    is_streaming: bool = False
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+
+
+class User(BaseModel):
+    username: str
@@ -0,0 +1,105 @@
+"""Password verification and JWT session tokens for the admin user."""
+
+import hashlib
+import hmac
+import time
+from datetime import datetime, timedelta
+
+import bcrypt
+import jwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+
+from . import schemas
+from .config import settings
+
+ALGORITHM = "HS256"
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+
+def hash_password(plain_password):
+    return bcrypt.hashpw(plain_password.encode(), bcrypt.gensalt()).decode()
+
+
+def verify_password(plain_password, password_hash):
+    try:
+        return bcrypt.checkpw(plain_password.encode(), password_hash.encode())
+    except ValueError:
+        return False
+
+
+# bcrypt is deliberately slow (~100ms); repeat /token calls with the
+# same credentials (token refreshes, impatient clients, brute-force
+# probes) would each burn that CPU. Cache the verdict for a short TTL,
+# keyed by a digest of the attempt so raw passwords are never retained;
+# the stored hash is part of the key, so rotation invalidates instantly.
+_AUTH_CACHE_TTL = 60.0
+_AUTH_CACHE_MAX = 128
+_auth_cache = {}
+
+
+def _check_password_cached(password, password_hash):
+    key = hashlib.sha256(
+        password.encode() + b"\x00" + password_hash.encode()
+    ).digest()
+    now = time.monotonic()
+    cached = _auth_cache.get(key)
+    if cached is not None and now - cached[1] < _AUTH_CACHE_TTL:
+        return cached[0]
+    result = verify_password(password, password_hash)
+    if len(_auth_cache) >= _AUTH_CACHE_MAX:
+        # Drop expired entries first; if a probe flood filled the cache
+        # with live negatives, start over rather than grow unbounded.
+        for k in [
+            k
+            for k, (_, ts) in _auth_cache.items()
+            if now - ts >= _AUTH_CACHE_TTL
+        ]:
+            del _auth_cache[k]
+        if len(_auth_cache) >= _AUTH_CACHE_MAX:
+            _auth_cache.clear()
+    _auth_cache[key] = (result, now)
+    return result
+
+
+def authenticate_user(username, password):
+    # Compare as bytes: compare_digest rejects non-ASCII str, and a
+    # submitted username is arbitrary user input.
+    if not hmac.compare_digest(
+        username.encode(), settings.ADMIN_USERNAME.encode()
+    ):
+        return None
+    if not settings.ADMIN_PASSWORD_HASH:
+        return None
+    if not _check_password_cached(password, settings.ADMIN_PASSWORD_HASH):
+        return None
+    return schemas.User(username=username)
+
+
+def create_access_token(data, expires_delta=None):
+    to_encode = dict(data)
+    expire = datetime.utcnow() + (
+        expires_delta
+        or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    to_encode["exp"] = expire
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+async def get_current_user(token=Depends(oauth2_scheme)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
+        )
+    except jwt.InvalidTokenError:
+        raise credentials_exception
+    username = payload.get("sub")
+    if username is None:
+        raise credentials_exception
+    return schemas.User(username=username)
@@ -0,0 +1,86 @@
+"""Single point of contact with the WireGuard control plane.
+
+The stock ``wg`` binary has no long-running mode to pool, so the way to
+avoid per-call fork/exec is to not exec at all: preshared keys are
+generated in-process (a psk is 32 random bytes, base64), and when
+pyroute2 is installed peer mutations go through one persistent netlink
+handle. Without pyroute2 the mutation paths fall back to ``wg set``
+subprocess calls, which is still one exec per mutation instead of one
+per helper invocation.
+"""
+
+import base64
+import os
+import subprocess
+import threading
+
+try:
+    from pyroute2 import WireGuard as _WireGuardNetlink
+except ImportError:
+    _WireGuardNetlink = None
+
+from .config import settings
+
+_handle = None
+_handle_lock = threading.Lock()
+
+
+def _netlink():
+    global _handle
+    if _handle is None:
+        with _handle_lock:
+            if _handle is None:
+                _handle = _WireGuardNetlink()
+    return _handle
+
+
+def genpsk():
+    """A WireGuard preshared key: 32 random bytes, base64 — no exec."""
+    return base64.b64encode(os.urandom(32)).decode()
+
+
+def set_peer(public_key, preshared_key=None, allowed_ips=None):
+    if _WireGuardNetlink is not None:
+        peer = {"public_key": public_key}
+        if preshared_key:
+            peer["preshared_key"] = preshared_key
+        if allowed_ips:
+            peer["allowed_ips"] = [
+                ip.strip() for ip in allowed_ips.split(",")
+            ]
+        _netlink().set(settings.WG_INTERFACE, peer=peer)
+        return
+    cmd = ["wg", "set", settings.WG_INTERFACE, "peer", public_key]
+    if allowed_ips:
+        cmd += ["allowed-ips", allowed_ips]
+    if preshared_key:
+        # The key arrives on stdin so it never shows up in /proc cmdline.
+        cmd += ["preshared-key", "/dev/stdin"]
+        subprocess.run(cmd, input=preshared_key.encode(), check=True)
+    else:
+        subprocess.run(cmd, check=True)
+
+
+def sync_interface(config_path):
+    """Load a full on-disk config into the running interface.
+
+    This is the O(all-peers) reconciliation path; incremental changes
+    should go through :func:`set_peer`/:func:`remove_peer`, which use
+    the persistent netlink handle when pyroute2 is available.
+    """
+    subprocess.run(
+        ["wg", "syncconf", settings.WG_INTERFACE, config_path], check=True
+    )
+
+
+def remove_peer(public_key):
+    if _WireGuardNetlink is not None:
+        _netlink().set(
+            settings.WG_INTERFACE,
+            peer={"public_key": public_key, "remove": True},
+        )
+        return
+    subprocess.run(
+        ["wg", "set", settings.WG_INTERFACE, "peer", public_key, "remove"],
+        check=True,
+    )
@@ -0,0 +1,19 @@
+"""Process-wide cache of the most recent parsed wg peer map.
+
+The broadcast task in :mod:`backend.main` already polls ``wg show`` on
+its tick; it publishes the parsed result here so HTTP handlers read an
+in-memory dict instead of spawning a subprocess per request.  Publication
+is a single module-attribute assignment — atomic under the GIL — so
+readers need no lock and always see a complete map.
+"""
+
+_latest = {}
+
+
+def publish(statuses):
+    global _latest
+    _latest = statuses
+
+
+def get_cached():
+    return _latest
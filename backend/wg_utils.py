@@ -0,0 +1,405 @@
+"""WireGuard helpers: key generation, config rendering, peer status."""
+
+import asyncio
+import base64
+import functools
+import hashlib
+import mmap
+import os
+import subprocess
+import threading
+from typing import NamedTuple
+
+from cachetools import TTLCache, cached
+
+try:
+    # WireGuard keys are raw Curve25519; generating them in-process is
+    # microseconds versus two fork/execs through the wg binary.
+    from cryptography.hazmat.primitives.asymmetric.x25519 import (
+        X25519PrivateKey,
+    )
+    from cryptography.hazmat.primitives.serialization import (
+        Encoding,
+        NoEncryption,
+        PrivateFormat,
+        PublicFormat,
+    )
+except ImportError:  # fall back to the wg binary
+    X25519PrivateKey = None
+
+from . import wg_rpc
+from .config import settings
+
+# Resolved once at import; the cache-miss path of get_youtube_ips does
+# no path arithmetic at all.
+_YT_IPS_PATH = os.path.join(
+    os.path.dirname(__file__), settings.YOUTUBE_IPS_FILE
+)
+
+
+def generate_keys():
+    """Return a fresh ``(private_key, public_key)`` pair."""
+    if X25519PrivateKey is not None:
+        secret = X25519PrivateKey.generate()
+        private_key = base64.b64encode(
+            secret.private_bytes(
+                Encoding.Raw, PrivateFormat.Raw, NoEncryption()
+            )
+        ).decode()
+        public_key = base64.b64encode(
+            secret.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+        ).decode()
+        return private_key, public_key
+    # Bytes capture with one ascii decode: wg output is pure ASCII, and
+    # skipping text mode avoids the locale codec's incremental decoder.
+    private_key = (
+        subprocess.run(["wg", "genkey"], capture_output=True, check=True)
+        .stdout.decode("ascii")
+        .strip()
+    )
+    public_key = (
+        subprocess.run(
+            ["wg", "pubkey"],
+            input=private_key.encode(),
+            capture_output=True,
+            check=True,
+        )
+        .stdout.decode("ascii")
+        .strip()
+    )
+    return private_key, public_key
+
+
+async def generate_keys_async():
+    """Keypair without blocking the event loop.
+
+    With in-process crypto the sync path already takes microseconds; on
+    the wg-binary fallback the fork/exec runs through asyncio so
+    concurrent generations overlap instead of serializing.
+    """
+    if X25519PrivateKey is not None:
+        return generate_keys()
+    proc = await asyncio.create_subprocess_exec(
+        "wg", "genkey", stdout=asyncio.subprocess.PIPE
+    )
+    out, _ = await proc.communicate()
+    private_key = out.decode().strip()
+    proc = await asyncio.create_subprocess_exec(
+        "wg",
+        "pubkey",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    out, _ = await proc.communicate(private_key.encode())
+    return private_key, out.decode().strip()
+
+
+async def generate_keys_bulk(n):
+    """``n`` keypairs at once, for batch client provisioning."""
+    return await asyncio.gather(
+        *(generate_keys_async() for _ in range(n))
+    )
+
+
+def generate_preshared_key():
+    return wg_rpc.genpsk()
+
+
+@cached(TTLCache(maxsize=1, ttl=3600))
+def get_youtube_ips():
+    """Extra CIDRs routed through every peer, cached for an hour.
+
+    The (rare) cache-miss path memory-maps the file and scans it as
+    bytes: splitlines, strip and the comment check all run as C-level
+    bytes operations instead of per-line text decoding.
+    """
+    try:
+        with open(_YT_IPS_PATH, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file cannot be mapped
+                return []
+            with mapped:
+                raw = mapped[:]
+    except FileNotFoundError:
+        return []
+    return [
+        line.decode()
+        for line in map(bytes.strip, raw.splitlines())
+        if line and not line.startswith(b"#")
+    ]
+
+
+@cached(TTLCache(maxsize=1, ttl=3600))
+def _get_youtube_ips_joined():
+    # The joined form is what config rendering actually consumes; cache
+    # it too so repeat renders skip the O(N) join over hundreds of CIDRs.
+    return ", ".join(get_youtube_ips())
+
+
+def clear_youtube_ip_caches():
+    """Drop the list, joined-string and combined-AllowedIPs caches."""
+    get_youtube_ips.cache_clear()
+    _get_youtube_ips_joined.cache_clear()
+    _combined_allowed.cache_clear()
+
+
+# One pre-formatted block per peer: a single .format plus one join pass
+# replaces four or five list appends per client.
+_PEER_TMPL_PSK = (
+    "[Peer]\n"
+    "PublicKey = {pk}\n"
+    "PresharedKey = {psk}\n"
+    "AllowedIPs = {ips}\n"
+)
+_PEER_TMPL_NOPSK = "[Peer]\nPublicKey = {pk}\nAllowedIPs = {ips}\n"
+
+# The [Interface] block is static for the process lifetime except for
+# the private key, so it is formatted once at import and every render
+# is prefix + key + suffix + peer section.
+_IFACE_PREFIX = (
+    "[Interface]\n"
+    f"Address = {settings.WG_SERVER_ADDRESS}\n"
+    f"ListenPort = {settings.WG_SERVER_LISTEN_PORT}\n"
+    "PrivateKey = "
+)
+_IFACE_SUFFIX = (
+    "\n"
+    "PostUp = iptables -A FORWARD -i %i -j ACCEPT;"
+    " iptables -t nat -A POSTROUTING -o eth0 -j MASQUERADE\n"
+    "PostDown = iptables -D FORWARD -i %i -j ACCEPT;"
+    " iptables -t nat -D POSTROUTING -o eth0 -j MASQUERADE\n"
+    "\n"
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _combined_allowed(client_ips, youtube_ips_str):
+    # Both inputs are stable between renders, so bulk re-renders hit
+    # the cache instead of re-concatenating per peer.
+    if youtube_ips_str:
+        return f"{client_ips}, {youtube_ips_str}"
+    return client_ips
+
+
+def combined_allowed_for(client_allowed_ips):
+    """A client's AllowedIPs plus the shared YouTube CIDRs, as wg wants it.
+
+    Public entry point for callers outside this module; the memoized
+    helpers behind it are implementation detail.
+    """
+    return _combined_allowed(client_allowed_ips, _get_youtube_ips_joined())
+
+
+def generate_wireguard_config(active_clients, server_private_key):
+    """Render the server-side config for pre-filtered active clients.
+
+    Callers pass rows the database already filtered on ``is_active``
+    (see :func:`backend.crud.get_active_clients`); disabled peers are
+    never hydrated or iterated here.
+    """
+    youtube_ips_str = _get_youtube_ips_joined()
+    peers = "\n".join(
+        (
+            _PEER_TMPL_PSK if client.preshared_key else _PEER_TMPL_NOPSK
+        ).format(
+            pk=client.public_key,
+            psk=client.preshared_key,
+            ips=_combined_allowed(client.allowed_ips, youtube_ips_str),
+        )
+        for client in active_clients
+    )
+    return _IFACE_PREFIX + server_private_key + _IFACE_SUFFIX + peers
+
+
+# Digest of the config most recently applied to the kernel; reconcile
+# loops that regenerate identical content skip the write and syncconf.
+_last_config_hash = None
+
+# Peer state as of the last successful apply, public_key ->
+# (preshared_key, allowed_ips). Lets the next apply reconfigure only
+# the peers that actually changed instead of syncing the whole
+# interface; None until the first full sync establishes a baseline.
+_last_peers_by_pubkey = None
+
+# Above this many added/removed/changed peers a full syncconf is
+# cheaper than the per-peer mutations.
+_DIFF_SYNC_THRESHOLD = 10
+
+
+def _peers_by_pubkey(active_clients):
+    youtube_ips_str = _get_youtube_ips_joined()
+    return {
+        client.public_key: (
+            client.preshared_key,
+            _combined_allowed(client.allowed_ips, youtube_ips_str),
+        )
+        for client in active_clients
+    }
+
+
+def _apply_peer_diff(new_peers):
+    """Reconcile the running interface peer-by-peer.
+
+    Returns False when there is no baseline or the diff exceeds
+    :data:`_DIFF_SYNC_THRESHOLD`, in which case the caller falls back
+    to a full syncconf.
+    """
+    if _last_peers_by_pubkey is None:
+        return False
+    removed = [
+        pk for pk in _last_peers_by_pubkey if pk not in new_peers
+    ]
+    changed = [
+        pk
+        for pk, state in new_peers.items()
+        if _last_peers_by_pubkey.get(pk) != state
+    ]
+    if len(removed) + len(changed) >= _DIFF_SYNC_THRESHOLD:
+        return False
+    for pk in removed:
+        wg_rpc.remove_peer(pk)
+    for pk in changed:
+        preshared_key, allowed_ips = new_peers[pk]
+        wg_rpc.set_peer(pk, preshared_key, allowed_ips)
+    return True
+
+
+def apply_wireguard_config(config_content, active_clients=None):
+    """Persist the config and load it into the running interface.
+
+    No-op when ``config_content`` matches what was last applied.  With
+    ``active_clients`` given, small changes go out as targeted ``wg
+    set`` mutations for just the affected peers — O(Δ) instead of the
+    O(all-peers) syncconf, which remains the large-diff fallback.
+    """
+    global _last_config_hash, _last_peers_by_pubkey
+    digest = hashlib.blake2b(
+        config_content.encode(), digest_size=16
+    ).digest()
+    if digest == _last_config_hash:
+        return
+    _write_config_atomic(config_content)
+    new_peers = (
+        _peers_by_pubkey(active_clients)
+        if active_clients is not None
+        else None
+    )
+    if new_peers is None or not _apply_peer_diff(new_peers):
+        wg_rpc.sync_interface(settings.WG_CONF_PATH)
+    _last_peers_by_pubkey = new_peers
+    _last_config_hash = digest
+
+
+def add_peer_live(public_key, preshared_key, allowed_ips):
+    """Add or update a single peer on the running interface.
+
+    O(1) regardless of how many peers exist, unlike a full config
+    regen + syncconf which reconfigures every peer.
+    """
+    wg_rpc.set_peer(public_key, preshared_key, allowed_ips)
+
+
+def remove_peer_live(public_key):
+    wg_rpc.remove_peer(public_key)
+
+
+# On-disk persistence after a live peer mutation is debounced: the
+# interface is already correct, the file only needs to catch up for the
+# next reboot, so bulk provisioning coalesces into one write per window.
+_CONFIG_WRITE_DEBOUNCE = 1.0
+_config_write_lock = threading.Lock()
+_config_write_timer = None
+
+
+def _write_config_atomic(config_content):
+    # Write-then-rename: readers (and a crash mid-write) only ever see
+    # the old or the new complete file, never a torn one, which also
+    # makes it safe to return without waiting on an fsync.
+    tmp = settings.WG_CONF_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(config_content)
+    os.replace(tmp, settings.WG_CONF_PATH)
+
+
+def schedule_config_write(config_content):
+    """Write ``config_content`` after the debounce window; latest wins."""
+    global _config_write_timer
+    with _config_write_lock:
+        if _config_write_timer is not None:
+            _config_write_timer.cancel()
+        _config_write_timer = threading.Timer(
+            _CONFIG_WRITE_DEBOUNCE,
+            _write_config_atomic,
+            args=(config_content,),
+        )
+        _config_write_timer.daemon = True
+        _config_write_timer.start()
+
+
+class PeerStatus(NamedTuple):
+    """Live state of one peer; a compact tuple, no per-peer hash table.
+
+    ``latest_handshake`` stays in unix seconds as wg reports it (0 means
+    never); consumers compare timestamps directly and only the clients
+    actually returned to the HTTP layer pay a datetime conversion.
+    """
+
+    preshared_key: str
+    endpoint: str
+    latest_handshake: int
+    transfer_rx: int
+    transfer_tx: int
+
+
+def get_peer_statuses(interface=None):
+    """Parse ``wg show <iface> dump`` into {public_key: PeerStatus}.
+
+    Output streams straight from the pipe: lines are parsed as they
+    arrive rather than materializing the whole stdout string and a list
+    of lines first.
+    """
+    statuses = {}
+    try:
+        proc = subprocess.Popen(
+            ["wg", "show", interface or settings.WG_INTERFACE, "dump"],
+            stdout=subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        return statuses
+    try:
+        # First line is the interface itself; the rest are peers.  The
+        # split is bounded at the last field we read (transfer_tx is
+        # index 6), and a line must actually carry that many fields —
+        # the old >= 5 check under-counted and tripped the IndexError
+        # catch-all on short lines, discarding the whole parse.
+        # The pipe stays in bytes (no text-mode incremental decoder);
+        # splitting, digit checks and int() all work on bytes, so only
+        # the three string fields per surviving row are decoded.
+        for i, line in enumerate(proc.stdout):
+            if i == 0:
+                continue
+            parts = line.rstrip(b"\n").split(b"\t", 7)
+            if len(parts) < 7:
+                continue
+            if not (
+                parts[4].isdigit()
+                and parts[5].isdigit()
+                and parts[6].isdigit()
+            ):
+                # One malformed row skips itself instead of unwinding
+                # the loop and discarding every parsed peer.
+                continue
+            statuses[parts[0].decode("ascii")] = PeerStatus(
+                preshared_key=parts[1].decode("ascii"),
+                endpoint=parts[2].decode("ascii"),
+                latest_handshake=int(parts[4]),
+                transfer_rx=int(parts[5]),
+                transfer_tx=int(parts[6]),
+            )
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    if proc.returncode != 0:
+        return {}
+    return statuses
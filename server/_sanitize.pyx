@@ -0,0 +1,32 @@
+# cython: language_level=3
+"""Compiled filename sanitizer.
+
+Optional fast path for :mod:`server.storage`; build it in place with
+
+    cythonize -i server/_sanitize.pyx
+
+storage falls back to its pure-Python implementation when this module
+has not been compiled, so the extension is never required.
+"""
+
+
+def sanitize_filename(str name, int max_len=255):
+    """Collapse runs of disallowed characters to one underscore."""
+    cdef list out = []
+    cdef Py_UCS4 ch
+    cdef bint in_run = False
+    for ch in name:
+        if (
+            (u"A" <= ch <= u"Z")
+            or (u"a" <= ch <= u"z")
+            or (u"0" <= ch <= u"9")
+            or ch == u"."
+            or ch == u"_"
+            or ch == u"-"
+        ):
+            out.append(ch)
+            in_run = False
+        elif not in_run:
+            out.append(u"_")
+            in_run = True
+    return u"".join(out).strip(u"_.- ")[:max_len]
@@ -0,0 +1,582 @@
+"""Asynchronous download manager.
+
+All downloads share a single asyncio event loop and one aiohttp
+``ClientSession`` with a pooled ``TCPConnector``, so N concurrent
+downloads cost N coroutines instead of N OS threads.  The event loop
+runs on a dedicated background thread and the public API stays
+synchronous: callers interact through :meth:`Downloader.start_download`
+and friends from any thread.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import os
+import threading
+from collections import namedtuple
+from dataclasses import dataclass, field
+
+import aiohttp
+
+try:
+    import liburing
+except ImportError:  # optional; the buffered-write fallback is always valid
+    liburing = None
+
+
+#: Immutable snapshot of one task, handed out by Downloader.get_status.
+StatusView = namedtuple(
+    "StatusView",
+    "status error progress bytes_downloaded total_size filepath url",
+)
+
+
+@dataclass(slots=True)
+class DownloadTask:
+    """Mutable per-download state with a fixed slotted layout.
+
+    A dict per task cost an 8-entry hash table plus a hashed lookup per
+    field access; slots give direct offset-based access and roughly a
+    third of the footprint.
+    """
+
+    url: str
+    filepath: str
+    status: str = "pending"
+    error: str | None = None
+    progress: float = 0.0
+    bytes_downloaded: int = 0
+    total_size: int = 0
+    future: object = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    view: StatusView | None = None
+
+
+def _preallocate(fd, size):
+    """Reserve blocks for the final file size in one call.
+
+    Growing the file write-by-write forces repeated extent/metadata
+    updates; reserving up front keeps the allocation contiguous.  Falls
+    back to a plain ftruncate where posix_fallocate is unavailable.
+    """
+    if size <= 0:
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        os.ftruncate(fd, size)
+
+
+class UringWriter:
+    """Batches file writes through a Linux io_uring submission queue.
+
+    Chunks are staged as submission entries and pushed to the kernel in
+    one ``io_uring_submit`` per ``max_batch`` writes, amortizing syscall
+    entry cost across the batch instead of paying one write(2) per chunk.
+    Requires the ``liburing`` binding; callers must fall back to buffered
+    writes when it is unavailable.
+    """
+
+    def __init__(self, fd, offset=0, max_batch=32):
+        self.fd = fd
+        self.offset = offset
+        self.max_batch = max_batch
+        self.ring = liburing.io_uring()
+        liburing.io_uring_queue_init(max_batch, self.ring)
+        # Buffers must stay alive until their completions are reaped.
+        self._pending = []
+
+    def write(self, chunk):
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        buf = bytearray(chunk)
+        liburing.io_uring_prep_write(sqe, self.fd, buf, len(buf), self.offset)
+        self.offset += len(buf)
+        self._pending.append(buf)
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        liburing.io_uring_submit(self.ring)
+        cqe = liburing.io_uring_cqe()
+        expected = sum(len(buf) for buf in self._pending)
+        completed = 0
+        error = 0
+        # Reap every completion before raising so a later flush (close
+        # runs one) never waits on entries this batch already consumed.
+        for _ in self._pending:
+            liburing.io_uring_wait_cqe(self.ring, cqe)
+            res = cqe.res
+            liburing.io_uring_cqe_seen(self.ring, cqe)
+            if res < 0:
+                if error == 0:
+                    error = -res
+            else:
+                completed += res
+        self._pending.clear()
+        if error:
+            # ENOSPC/EIO arrive here, not at write(2) time; surface them
+            # so the transfer fails instead of completing with holes.
+            raise OSError(error, os.strerror(error))
+        if completed != expected:
+            raise OSError(
+                "short io_uring write: "
+                f"{completed} of {expected} bytes reached disk"
+            )
+
+    def close(self):
+        self.flush()
+        liburing.io_uring_queue_exit(self.ring)
+
+
+class Downloader:
+    """Manages concurrent file downloads over a shared connection pool."""
+
+    #: Default read/write chunk size.  Should be at least as large as the
+    #: local TCP receive buffer; bigger chunks mean proportionally fewer
+    #: loop iterations, syscalls, and status updates per download.
+    DEFAULT_CHUNK_SIZE = 1 << 16
+
+    def __init__(self, num_workers=4, chunk_size=DEFAULT_CHUNK_SIZE, segments=1):
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        # When > 1 and the server supports byte ranges, each download is
+        # split into this many parallel range requests.
+        self.segments = segments
+        # Bounds how many downloads run concurrently; excess tasks stay
+        # "pending" until a slot frees up, so scheduling 10k URLs costs
+        # 10k coroutines, not 10k active transfers.
+        self._slots = asyncio.Semaphore(num_workers)
+        # Signalled whenever task state changes enough to be worth
+        # redrawing; display code waits on this instead of polling.
+        self._dirty = threading.Event()
+        # Ids whose status field changed since the last drain; lets
+        # schedulers poll proportional to what changed, not what's active.
+        self._changed_ids = set()
+        # Task ids only need to be unique within this process; a counter
+        # plus the pid is far cheaper than uuid4 when enqueuing in bulk.
+        self._id_counter = itertools.count()
+        # Directories we have already created; lets bulk downloads into a
+        # common folder skip the stat/mkdir walk after the first file.
+        self._ensured_dirs = set()
+        self._dir_lock = threading.Lock()
+        self.download_tasks = {}
+        self.lock = threading.Lock()
+        self._session = None
+        # Invoked as callback(download_id, status) whenever a task hits a
+        # terminal state; lets schedulers react without polling.
+        self._on_complete = None
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._run_loop, name="downloader-loop", daemon=True
+        )
+        self._loop_thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def set_completion_callback(self, callback):
+        """Register a callable fired on every terminal state transition."""
+        self._on_complete = callback
+
+    def _notify_complete(self, download_id, status):
+        callback = self._on_complete
+        if callback is not None:
+            try:
+                callback(download_id, status)
+            except Exception:  # noqa: BLE001 - observers must not kill transfers
+                pass
+
+    async def _get_session(self):
+        # Lazily created on the loop thread; reused across all downloads
+        # so keep-alive connections and TLS sessions are amortized.
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.num_workers, limit_per_host=4
+            )
+            # No total timeout: large downloads legitimately run for a
+            # long time.  Stalled connects/reads still fail promptly.
+            timeout = aiohttp.ClientTimeout(
+                total=None, connect=10, sock_read=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=timeout
+            )
+        return self._session
+
+    def start_download(self, url, filepath):
+        """Schedule a download and return its id immediately."""
+        download_id = f"dl-{next(self._id_counter):x}-{os.getpid():x}"
+        file_dir = os.path.dirname(filepath)
+        if file_dir:
+            with self._dir_lock:
+                if file_dir not in self._ensured_dirs:
+                    os.makedirs(file_dir, exist_ok=True)
+                    self._ensured_dirs.add(file_dir)
+        task = DownloadTask(url=url, filepath=filepath)
+        with self.lock:
+            self.download_tasks[download_id] = task
+        task.future = asyncio.run_coroutine_threadsafe(
+            self._download_file(url, filepath, download_id), self._loop
+        )
+        self._dirty.set()
+        return download_id
+
+    async def _download_file(self, url, filepath, download_id):
+        with self.lock:
+            task = self.download_tasks.get(download_id)
+            if task is None:
+                return
+        cancel_event = task.cancel_event
+        async with self._slots:
+            if cancel_event.is_set():
+                with self.lock:
+                    task.status = "cancelled"
+                self._changed_ids.add(download_id)
+                self._dirty.set()
+                self._notify_complete(download_id, "cancelled")
+                return
+            with self.lock:
+                task.status = "downloading"
+            self._changed_ids.add(download_id)
+            self._dirty.set()
+            await self._run_download(url, filepath, task, cancel_event)
+            self._changed_ids.add(download_id)
+            self._notify_complete(download_id, task.status)
+
+    async def _run_download(self, url, filepath, task, cancel_event):
+        try:
+            session = await self._get_session()
+            total_size, accept_ranges = await self._probe(session, url)
+
+            existing = 0
+            if accept_ranges and os.path.exists(filepath):
+                existing = os.path.getsize(filepath)
+            if total_size and existing >= total_size:
+                with self.lock:
+                    task.total_size = total_size
+                    task.bytes_downloaded = total_size
+                    task.status = "completed"
+                    task.progress = 100.0
+                return
+            with self.lock:
+                task.total_size = total_size
+
+            if self.segments > 1 and accept_ranges and total_size:
+                await self._download_segmented(
+                    session, url, filepath, task, total_size, cancel_event
+                )
+            else:
+                await self._download_stream(
+                    session,
+                    url,
+                    filepath,
+                    task,
+                    total_size,
+                    existing,
+                    cancel_event,
+                )
+            if task.status == "cancelled":
+                self._dirty.set()
+                return
+
+            with self.lock:
+                task.status = "completed"
+                task.progress = 100.0
+            self._dirty.set()
+        except Exception as exc:  # noqa: BLE001 - surfaced via task status
+            with self.lock:
+                task.status = "failed"
+                task.error = str(exc)
+            self._dirty.set()
+
+    async def _probe(self, session, url):
+        """HEAD the url for its size and byte-range support."""
+        try:
+            async with session.head(url, allow_redirects=True) as response:
+                total_size = int(response.headers.get("Content-Length", 0))
+                accept_ranges = (
+                    response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                )
+                return total_size, accept_ranges
+        except aiohttp.ClientError:
+            return 0, False
+
+    async def _download_stream(
+        self, session, url, filepath, task, total_size, existing, cancel_event
+    ):
+        """Single-connection download, resuming a partial file via Range."""
+        # Ask for the raw representation: transparently decompressing a
+        # download would route every chunk through an extra userspace
+        # inflate + copy, and break Range offsets against the stored file.
+        headers = {"Accept-Encoding": "identity"}
+        if existing:
+            headers["Range"] = "bytes=%d-" % existing
+        async with session.get(url, headers=headers) as response:
+            response.raise_for_status()
+            if existing and response.status != 206:
+                # Server ignored the range request; start over.
+                existing = 0
+            if not total_size:
+                total_size = existing + int(
+                    response.headers.get("content-length", 0)
+                )
+                with self.lock:
+                    task.total_size = total_size
+
+            bytes_downloaded = existing
+            last_reported = existing
+            # Progress is display-only; publishing it more often than
+            # every 0.1% (floored at 1 MiB) is invisible to the user.
+            report_every = (
+                max(total_size // 1000, 1 << 20) if total_size else 1 << 20
+            )
+            task.bytes_downloaded = bytes_downloaded
+            with contextlib.ExitStack() as stack:
+                if liburing is not None and os.name == "posix":
+                    fd = os.open(
+                        filepath, os.O_WRONLY | os.O_CREAT, 0o644
+                    )
+                    stack.callback(os.close, fd)
+                    _preallocate(fd, total_size)
+                    writer = UringWriter(fd, offset=existing)
+                    stack.callback(writer.close)
+                    write = writer.write
+                    truncate = lambda n: os.ftruncate(fd, n)  # noqa: E731
+                else:
+                    # Match the userspace write buffer to the network
+                    # chunking so each chunk flushes in a single write(2).
+                    # A resume must not use append mode: preallocation
+                    # extends the file to total_size, and O_APPEND would
+                    # land every chunk at that EOF instead of at the
+                    # partial-file offset.  r+b plus an explicit seek
+                    # writes where the previous attempt stopped.
+                    mode = "r+b" if existing else "wb"
+                    f = stack.enter_context(
+                        open(filepath, mode, buffering=self.chunk_size)
+                    )
+                    _preallocate(f.fileno(), total_size)
+                    if existing:
+                        f.seek(existing)
+                    write = f.write
+                    truncate = f.truncate
+                try:
+                    async for chunk in response.content.iter_chunked(
+                        self.chunk_size
+                    ):
+                        # Lock-free fast path: the cancel check is a
+                        # plain Event flag and the counter updates are
+                        # single dict item assignments, which are atomic
+                        # under the GIL.  Only terminal state
+                        # transitions take self.lock.
+                        if cancel_event.is_set():
+                            with self.lock:
+                                task.status = "cancelled"
+                            return
+                        write(chunk)
+                        bytes_downloaded += len(chunk)
+                        if bytes_downloaded - last_reported >= report_every:
+                            task.bytes_downloaded = bytes_downloaded
+                            if total_size:
+                                task.progress = (
+                                    bytes_downloaded / total_size
+                                ) * 100
+                            self._dirty.set()
+                            last_reported = bytes_downloaded
+                finally:
+                    if bytes_downloaded < total_size:
+                        # Cancelled or failed mid-transfer: drop the
+                        # preallocated tail so the on-disk size reflects
+                        # real progress — a later resume Ranges from
+                        # here, and the completed short-circuit never
+                        # mistakes zero fill for data.
+                        truncate(bytes_downloaded)
+                        task.bytes_downloaded = bytes_downloaded
+            task.bytes_downloaded = bytes_downloaded
+            if total_size:
+                task.progress = (bytes_downloaded / total_size) * 100
+
+    async def _download_segmented(
+        self, session, url, filepath, task, total_size, cancel_event
+    ):
+        """Fan a download out across ``self.segments`` range requests.
+
+        Each segment writes into its fixed offset of the pre-sized output
+        file with pwrite, so no coordination between segments is needed.
+        """
+        fd = os.open(filepath, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _preallocate(fd, total_size)
+            segment_size = -(-total_size // self.segments)
+            counters = [0] * self.segments
+            last_reported = [0]
+            report_every = max(total_size // 1000, 1 << 20)
+
+            async def fetch(index):
+                start = index * segment_size
+                end = min(total_size, start + segment_size) - 1
+                headers = {
+                    "Accept-Encoding": "identity",
+                    "Range": "bytes=%d-%d" % (start, end),
+                }
+                async with session.get(url, headers=headers) as response:
+                    response.raise_for_status()
+                    offset = start
+                    async for chunk in response.content.iter_chunked(
+                        self.chunk_size
+                    ):
+                        if cancel_event.is_set():
+                            with self.lock:
+                                task.status = "cancelled"
+                            return
+                        os.pwrite(fd, chunk, offset)
+                        offset += len(chunk)
+                        counters[index] += len(chunk)
+                        bytes_downloaded = sum(counters)
+                        if (
+                            bytes_downloaded - last_reported[0]
+                            >= report_every
+                        ):
+                            task.bytes_downloaded = bytes_downloaded
+                            task.progress = (
+                                bytes_downloaded / total_size
+                            ) * 100
+                            self._dirty.set()
+                            last_reported[0] = bytes_downloaded
+
+            try:
+                await asyncio.gather(
+                    *(fetch(index) for index in range(self.segments))
+                )
+            except BaseException:
+                os.ftruncate(fd, counters[0])
+                task.bytes_downloaded = counters[0]
+                raise
+            if task.status == "cancelled":
+                # Only segment 0's prefix is contiguous from offset 0;
+                # later segments leave zero holes behind them.  Truncate
+                # to that prefix so the preallocated size never passes
+                # for completed data on resume.
+                os.ftruncate(fd, counters[0])
+                task.bytes_downloaded = counters[0]
+                return
+            task.bytes_downloaded = sum(counters)
+            task.progress = (task.bytes_downloaded / total_size) * 100
+        finally:
+            os.close(fd)
+
+    def cancel_download(self, download_id):
+        with self.lock:
+            task = self.download_tasks.get(download_id)
+            if task is None or task.status not in ("pending", "downloading"):
+                return False
+            task.status = "cancelling"
+            task.cancel_event.set()
+        return True
+
+    def resume_download(self, download_id):
+        """Re-queue a failed or cancelled download.
+
+        If the server supports byte ranges the transfer continues from the
+        bytes already persisted on disk instead of starting over.
+        """
+        with self.lock:
+            task = self.download_tasks.get(download_id)
+            if task is None or task.status not in ("failed", "cancelled"):
+                return False
+            task.status = "pending"
+            task.error = None
+            task.cancel_event = threading.Event()
+        future = asyncio.run_coroutine_threadsafe(
+            self._download_file(
+                task.url, task.filepath, download_id
+            ),
+            self._loop,
+        )
+        with self.lock:
+            task.future = future
+        return True
+
+    def get_status(self, download_id):
+        """Return a :class:`StatusView` snapshot, or None if unknown.
+
+        The view is cached on the task and only rebuilt when the status
+        or byte counter actually moved, so repeated polling of an idle
+        task allocates nothing.
+        """
+        with self.lock:
+            task = self.download_tasks.get(download_id)
+            if task is None:
+                return None
+            return self._view_of(task)
+
+    @staticmethod
+    def _view_of(task):
+        # Caller holds self.lock.
+        view = task.view
+        if (
+            view is None
+            or view.status != task.status
+            or view.bytes_downloaded != task.bytes_downloaded
+        ):
+            view = StatusView(
+                task.status,
+                task.error,
+                task.progress,
+                task.bytes_downloaded,
+                task.total_size,
+                task.filepath,
+                task.url,
+            )
+            task.view = view
+        return view
+
+    def get_statuses(self, download_ids):
+        """Snapshot several tasks with a single lock acquisition.
+
+        Unknown ids are silently omitted from the result.
+        """
+        with self.lock:
+            return {
+                download_id: self._view_of(task)
+                for download_id in download_ids
+                if (task := self.download_tasks.get(download_id)) is not None
+            }
+
+    def get_all_statuses(self):
+        with self.lock:
+            return {
+                download_id: self._view_of(task)
+                for download_id, task in self.download_tasks.items()
+            }
+
+    def drain_status_changes(self):
+        """Return views for tasks whose status changed since last drain.
+
+        Consuming the change set resets it, so each transition is
+        reported exactly once; an empty dict means nothing moved.
+        """
+        with self.lock:
+            changed = self._changed_ids
+            self._changed_ids = set()
+            return {
+                download_id: self._view_of(task)
+                for download_id in changed
+                if (task := self.download_tasks.get(download_id)) is not None
+            }
+
+    def shutdown(self):
+        """Cancel all outstanding downloads and stop the background loop."""
+        with self.lock:
+            tasks = list(self.download_tasks.values())
+        for task in tasks:
+            task.cancel_event.set()
+        if self._session is not None:
+            with contextlib.suppress(Exception):
+                asyncio.run_coroutine_threadsafe(
+                    self._session.close(), self._loop
+                ).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join(timeout=5)
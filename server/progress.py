@@ -0,0 +1,115 @@
+"""Console progress display for :class:`server.downloader.Downloader`."""
+
+import functools
+import os
+import sys
+import threading
+
+_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+# Home the cursor and clear the screen in-band. Windows 10+ consoles
+# understand ANSI too once enabled, but default to no-op there rather
+# than forking a shell for cls.
+_CLEAR = "\x1b[H\x1b[2J" if os.name != "nt" else ""
+
+
+@functools.lru_cache(maxsize=2048)
+def _percent_str(deci_percent):
+    # Keyed on tenths of a percent, which is exactly the displayed
+    # resolution, so at most 1001 distinct entries ever exist.
+    return f"{deci_percent / 10:5.1f}%"
+
+
+@functools.lru_cache(maxsize=2048)
+def _human_readable_size(num_bytes):
+    # Closed-form unit pick: each power of 1024 is 10 bits, so
+    # bit_length()//10 lands on the right unit without a division loop.
+    index = min(max(0, (num_bytes.bit_length() - 1) // 10), len(_UNITS) - 1)
+    return f"{num_bytes / (1 << (10 * index)):.2f}{_UNITS[index]}"
+
+
+class ProgressTracker:
+    """Renders a live console view of a downloader's tasks."""
+
+    BAR_WIDTH = 30
+
+    def __init__(self, downloader):
+        self.downloader = downloader
+        self._stop_event = threading.Event()
+        self._display_thread = None
+        # All possible bar renderings, indexed by filled length.
+        self._bars = tuple(
+            "█" * i + "-" * (self.BAR_WIDTH - i)
+            for i in range(self.BAR_WIDTH + 1)
+        )
+
+    def get_human_readable_size(self, num_bytes):
+        """Format a byte count as e.g. ``"12.34MB"``.
+
+        Counts above 1 MiB are quantized to 64 KiB steps so successive
+        refreshes of an active download collapse onto one cache entry.
+        """
+        num_bytes = int(num_bytes)
+        if num_bytes > (1 << 20):
+            num_bytes &= ~0xFFFF
+        return _human_readable_size(num_bytes)
+
+    def display_overall_progress(self, clear_screen=True):
+        statuses = self.downloader.get_all_statuses()
+        # Render the whole frame into one string and emit it with a
+        # single write: one syscall per refresh instead of one per line,
+        # and no mid-frame tearing on the terminal.
+        prefix = _CLEAR if clear_screen else ""
+        out = [f"Tracking {len(statuses)} download(s)", "=" * 60]
+        for download_id, status in statuses.items():
+            percent = status.progress
+            filled = min(int(self.BAR_WIDTH * percent / 100), self.BAR_WIDTH)
+            bar = self._bars[filled]
+            out.append(f"[{download_id[:8]}] {status.status}")
+            out.append(f"  |{bar}| {_percent_str(int(percent * 10))}")
+            out.append(
+                f"  {self.get_human_readable_size(status.bytes_downloaded)}"
+                f" / {self.get_human_readable_size(status.total_size)}"
+            )
+            if status.error:
+                out.append(f"  error: {status.error}")
+        out.append("=" * 60)
+        frame = prefix + "\n".join(out) + "\n"
+        # Write the encoded frame straight to the binary layer, skipping
+        # the TextIOWrapper's line-buffering heuristics on a TTY: exactly
+        # one write(2) and one flush per frame.
+        buffer = getattr(sys.stdout, "buffer", None)
+        if buffer is not None:
+            buffer.write(frame.encode(errors="replace"))
+            buffer.flush()
+        else:  # stdout replaced by a text stream (tests, capture)
+            sys.stdout.write(frame)
+            sys.stdout.flush()
+
+    def start_live_display(self, interval_seconds=1):
+        if self._display_thread is not None:
+            return
+        self._stop_event.clear()
+
+        def loop():
+            dirty = self.downloader._dirty
+            self.display_overall_progress()
+            while not self._stop_event.is_set():
+                # Sleep until the downloader reports a visible change (or
+                # the timeout passes with nothing to draw), then cap the
+                # redraw rate at one frame per interval.
+                if dirty.wait(interval_seconds):
+                    dirty.clear()
+                    self.display_overall_progress()
+                    self._stop_event.wait(interval_seconds)
+
+        self._display_thread = threading.Thread(
+            target=loop, name="progress-display", daemon=True
+        )
+        self._display_thread.start()
+
+    def stop_live_display(self):
+        self._stop_event.set()
+        if self._display_thread is not None:
+            self._display_thread.join(timeout=2)
+            self._display_thread = None
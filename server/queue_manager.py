@@ -0,0 +1,329 @@
+"""Priority queue front-end for :class:`server.downloader.Downloader`.
+
+Tasks wait in a binary heap ordered by ``(priority, time_added)`` —
+lower priority value dispatches first, ties broken by arrival — and a
+background thread feeds them to the downloader whenever a concurrency
+slot is free.
+"""
+
+import heapq
+import itertools
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from .downloader import Downloader
+
+TERMINAL_STATES = ("completed", "failed", "cancelled")
+
+logger = logging.getLogger(__name__)
+
+
+def enable_async_logging(level=logging.DEBUG):
+    """Route this module's records through a QueueHandler/QueueListener.
+
+    Log emission from the dispatch thread becomes a plain queue put; the
+    returned listener performs the actual I/O on its own thread.  Callers
+    own the listener and should stop() it on shutdown.
+    """
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(level)
+    listener = logging.handlers.QueueListener(
+        log_queue, logging.StreamHandler()
+    )
+    listener.start()
+    return listener
+
+
+@dataclass(slots=True)
+class Task:
+    """One queued download; slotted for compact storage and fast access."""
+
+    qm_id: str
+    url: str
+    filepath: str
+    priority: int
+    time_added: float
+    status: str = "queued"
+
+
+class QueueManager:
+    """Schedules queued downloads onto a bounded set of active slots."""
+
+    def __init__(self, downloader=None, max_concurrent=4, storage=None):
+        self.downloader = downloader or Downloader(num_workers=max_concurrent)
+        # Optional StorageOptimizer; when present, partial files of failed
+        # downloads are cleaned up on its background pool.
+        self.storage = storage
+        self.max_concurrent = max_concurrent
+        self.queue_lock = threading.Lock()
+        # Heap of (priority, time_added, qm_id, task_details).  Removal is
+        # lazy: remove_download records the qm_id and the dispatch loop
+        # discards matching entries when they surface at the top.
+        self.pending_queue = []
+        self._removed_qm_ids = set()
+        # O(1) lookup indexes kept in step with the heap and the active
+        # set: qm_id -> task_details while pending, qm_id -> downloader_id
+        # once dispatched.  The latter is the reverse of active_downloads,
+        # set on dispatch commit and dropped on completion reap, so
+        # cancel/status by qm_id never iterates the active set.
+        self._pending_index = {}
+        self._qm_to_downloader = {}
+        # downloader_id -> task_details for tasks handed to the downloader.
+        self.active_downloads = {}
+        # Producers hand tasks over through this MPSC channel (C-level,
+        # effectively lock-free) so add_download never touches queue_lock;
+        # the dispatch thread is the only one feeding the heap.
+        self._submit_queue = queue.SimpleQueue()
+        # next(itertools.count()) is atomic at the C level, so id minting
+        # needs no lock at all.
+        self._qm_id_gen = itertools.count(1).__next__
+        self._stop_event = threading.Event()
+        # Observability hooks: pulsed after a dispatch commit and after a
+        # completion reap.  Tests wait on these instead of sleeping.
+        self._dispatched_event = threading.Event()
+        self._completed_event = threading.Event()
+        # Wakes the dispatch loop when there is work to look at; the wait
+        # timeout below is only a safety net against lost wakeups.
+        self._wake = threading.Event()
+        # Copy-on-write snapshot (pending_tuple, active_tuple) published
+        # by the dispatch thread with one atomic reference assignment;
+        # get_queue_status reads it without touching queue_lock.
+        self._snapshot = ((), ())
+        # Bumped each time a new snapshot is published; readers compare
+        # it against the "gen" they last saw to skip unchanged polls,
+        # and the dict view below is rebuilt once per generation.
+        self._snapshot_gen = 0
+        self._status_view = None
+        # True whenever queue contents changed since the last published
+        # snapshot; lets idle loop passes skip the O(n log n) rebuild.
+        self._state_dirty = True
+        self.downloader.set_completion_callback(self.notify_completion)
+        self._process_thread = threading.Thread(
+            target=self._process_queue_loop, name="queue-dispatch", daemon=True
+        )
+        self._process_thread.start()
+
+    def _generate_qm_id(self):
+        return f"qm_{self._qm_id_gen()}"
+
+    def add_download(self, url, filepath, priority=5):
+        """Queue a download; lower ``priority`` values dispatch first."""
+        qm_id = self._generate_qm_id()
+        task_details = Task(
+            qm_id=qm_id,
+            url=url,
+            filepath=filepath,
+            priority=priority,
+            time_added=time.time(),
+        )
+        # Publish the index entry before handing the task over so status
+        # and remove calls can see it immediately; a single dict item
+        # assignment is atomic under the GIL.
+        self._pending_index[qm_id] = task_details
+        self._submit_queue.put(
+            (priority, task_details.time_added, qm_id, task_details)
+        )
+        logger.debug("added %s (priority %s)", qm_id, priority)
+        self._wake.set()
+        return qm_id
+
+    def notify_completion(self, downloader_id, status):
+        """Completion hook invoked by the downloader on terminal states."""
+        self._wake.set()
+
+    def remove_download(self, qm_id):
+        """Drop a pending task or cancel it if already dispatched."""
+        with self.queue_lock:
+            task_details = self._pending_index.pop(qm_id, None)
+            if task_details is not None:
+                self._removed_qm_ids.add(qm_id)
+                task_details.status = "removed"
+                self._state_dirty = True
+                logger.debug("removed %s", qm_id)
+                return True
+            downloader_id = self._qm_to_downloader.get(qm_id)
+            if downloader_id is not None:
+                self.active_downloads[downloader_id].status = "cancelling"
+        if downloader_id is None:
+            return False
+        self.downloader.cancel_download(downloader_id)
+        logger.debug("cancelling %s", qm_id)
+        self._wake.set()
+        return True
+
+    # Locking invariant: downloader.* methods take the downloader's own
+    # lock and must never be called while queue_lock is held, or the two
+    # components can convoy (or deadlock via the completion callback).
+    # Each phase below snapshots under queue_lock, talks to the
+    # downloader unlocked, then re-acquires to commit.
+
+    def _process_queue_loop(self):
+        while not self._stop_event.is_set():
+            self._reap_finished()
+            self._dispatch_pending()
+            self._publish_snapshot()
+            # Event-driven: sleep until an add/remove/completion signals,
+            # with a periodic timeout as a backstop.
+            self._wake.wait(timeout=5)
+            self._wake.clear()
+
+    def _publish_snapshot(self):
+        if not self._state_dirty:
+            return
+        self._state_dirty = False
+        with self.queue_lock:
+            pending = tuple(
+                entry[3]
+                for entry in sorted(self.pending_queue)
+                if entry[2] not in self._removed_qm_ids
+            )
+            active = tuple(self.active_downloads.values())
+        self._snapshot = (pending, active)
+        self._snapshot_gen += 1
+
+    def _reap_finished(self):
+        # Pull only the tasks whose status actually changed since the
+        # last pass; cost is proportional to transitions, not to the
+        # number of active downloads.
+        changes = self.downloader.drain_status_changes()
+        if not changes:
+            return
+        incomplete = []
+        with self.queue_lock:
+            for downloader_id, status in changes.items():
+                task_details = self.active_downloads.get(downloader_id)
+                if task_details is None:
+                    continue
+                if status.status in TERMINAL_STATES:
+                    task_details.status = status.status
+                    self._state_dirty = True
+                    del self.active_downloads[downloader_id]
+                    self._qm_to_downloader.pop(task_details.qm_id, None)
+                    if task_details.status == "failed":
+                        incomplete.append(task_details.filepath)
+                    logger.debug(
+                        "%s finished: %s",
+                        task_details.qm_id,
+                        task_details.status,
+                    )
+        if incomplete and self.storage is not None:
+            # Fire-and-forget: unlinks happen on the storage pool.
+            self.storage.cleanup_incomplete_downloads(incomplete)
+        self._completed_event.set()
+
+    def _drain_submissions(self):
+        entries = []
+        while True:
+            try:
+                entries.append(self._submit_queue.get_nowait())
+            except queue.Empty:
+                break
+        if entries:
+            with self.queue_lock:
+                for entry in entries:
+                    heapq.heappush(self.pending_queue, entry)
+            self._state_dirty = True
+
+    def _dispatch_pending(self):
+        self._drain_submissions()
+        while True:
+            with self.queue_lock:
+                if (
+                    len(self.active_downloads) >= self.max_concurrent
+                    or not self.pending_queue
+                ):
+                    return
+                entry = heapq.heappop(self.pending_queue)
+                qm_id, task_details = entry[2], entry[3]
+                if qm_id in self._removed_qm_ids:
+                    self._removed_qm_ids.discard(qm_id)
+                    continue
+
+            downloader_id = self.downloader.start_download(
+                task_details.url, task_details.filepath
+            )
+
+            cancel_after = None
+            with self.queue_lock:
+                if not downloader_id:
+                    if qm_id in self._removed_qm_ids:
+                        self._removed_qm_ids.discard(qm_id)
+                    else:
+                        heapq.heappush(self.pending_queue, entry)
+                    return
+                self._pending_index.pop(qm_id, None)
+                self.active_downloads[downloader_id] = task_details
+                self._qm_to_downloader[qm_id] = downloader_id
+                self._state_dirty = True
+                if qm_id in self._removed_qm_ids:
+                    # Removed while we were starting it: let the normal
+                    # cancellation path reap it.
+                    self._removed_qm_ids.discard(qm_id)
+                    task_details.status = "cancelling"
+                    cancel_after = downloader_id
+                else:
+                    task_details.status = "active"
+            if cancel_after is not None:
+                self.downloader.cancel_download(cancel_after)
+            else:
+                logger.debug("dispatched %s -> %s", qm_id, downloader_id)
+            self._dispatched_event.set()
+
+    def get_task_status(self, qm_id):
+        """Status for one task, read without taking queue_lock.
+
+        Each lookup is a single dict read (atomic under the GIL) against
+        indexes the dispatch thread keeps consistent; a task that
+        finishes between two reads just comes back as None, the same
+        answer a locked read a moment later would give.
+        """
+        task_details = self._pending_index.get(qm_id)
+        if task_details is not None:
+            return asdict(task_details)
+        downloader_id = self._qm_to_downloader.get(qm_id)
+        if downloader_id is None:
+            return None
+        task_details = self.active_downloads.get(downloader_id)
+        if task_details is None:
+            return None
+        details = asdict(task_details)
+        status = self.downloader.get_status(downloader_id)
+        if status is not None:
+            details["progress"] = status.progress
+            details["bytes_downloaded"] = status.bytes_downloaded
+            details["total_size"] = status.total_size
+        return details
+
+    def get_queue_status(self):
+        """Snapshot of the queue, read without taking queue_lock.
+
+        Returns the snapshot last published by the dispatch thread (at
+        most one loop pass stale, and the wake event makes that
+        milliseconds in practice).  The result carries a ``gen`` counter
+        and is cached per generation: steady-state polls get the same
+        dict back for O(1) cost, and a caller that remembers the last
+        ``gen`` it saw can skip its own downstream work when the value
+        has not moved.  Callers must treat the result as read-only.
+        """
+        gen = self._snapshot_gen
+        view = self._status_view
+        if view is None or view["gen"] != gen:
+            pending, active = self._snapshot
+            view = {
+                "gen": gen,
+                "pending": list(pending),
+                "active": list(active),
+                "max_concurrent": self.max_concurrent,
+            }
+            self._status_view = view
+        return view
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+        self._process_thread.join(timeout=5)
@@ -0,0 +1,134 @@
+"""Filesystem helpers for download placement and cleanup."""
+
+import concurrent.futures
+import functools
+import os
+import re
+import stat
+import threading
+import time
+import urllib.parse
+
+# Collapses every run of disallowed characters to one underscore; doing
+# this in one C-level pass beats a per-character Python loop by an order
+# of magnitude on long names.
+_SANITIZE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+try:
+    # Optional Cython extension (see _sanitize.pyx); behaviour-identical
+    # to the regex fallback below.
+    from ._sanitize import sanitize_filename
+except ImportError:
+
+    def sanitize_filename(name, max_len=255):
+        return _SANITIZE_RE.sub("_", name).strip("_.- ")[:max_len]
+
+
+@functools.lru_cache(maxsize=64)
+def _abs(path):
+    # abspath walks getcwd + normpath every call; download directories
+    # are a handful of stable values (and the cwd does not move under a
+    # running server), so cache the resolution.
+    return os.path.abspath(path)
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_filepath(url, filename, directory):
+    # Pure: same inputs always give the same path, so repeat suggestions
+    # for the same URL are a cache hit.  urlparse handles query strings
+    # and fragments correctly, unlike naive splitting.
+    name = filename or os.path.basename(urllib.parse.urlparse(url).path)
+    sanitized = sanitize_filename(name)
+    return os.path.join(directory, sanitized or "download")
+
+
+class StorageOptimizer:
+    """Plans where downloads land and cleans up after failures."""
+
+    #: How long a free-space reading stays valid.  Dispatch decisions may
+    #: query this per task; one statvfs every couple of seconds is plenty.
+    FREE_SPACE_TTL = 2.0
+
+    def __init__(self, default_download_dir="downloads"):
+        self.default_download_dir = default_download_dir
+        # Resolved once; every suggestion into the default dir reuses it.
+        self._abs_default = os.path.abspath(default_download_dir)
+        # directory -> (monotonic expiry, free bytes)
+        self._free_space_cache = {}
+        # Directories already created; skips the stat/mkdir walk on every
+        # later suggestion into the same folder.
+        self._ensured_dirs = set()
+        self._dir_lock = threading.Lock()
+        # Unlink syscalls run here so schedulers never block on the
+        # filesystem when a burst of downloads fails at once.
+        self._cleanup_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="storage-cleanup"
+        )
+
+    def get_free_space(self, path=None):
+        """Free bytes on the filesystem containing ``path``, TTL-cached."""
+        check_path = path or self.default_download_dir
+        if not os.path.isdir(check_path):
+            check_path = os.path.dirname(check_path) or "."
+        now = time.monotonic()
+        cached = self._free_space_cache.get(check_path)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        # One statvfs, skipping shutil.disk_usage's cross-platform shim.
+        vfs = os.statvfs(check_path)
+        free = vfs.f_bavail * vfs.f_frsize
+        self._free_space_cache[check_path] = (now + self.FREE_SPACE_TTL, free)
+        return free
+
+    def get_file_size(self, filepath):
+        # Single stat instead of exists + isfile + getsize (three).
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return 0
+        return st.st_size if stat.S_ISREG(st.st_mode) else 0
+
+    def ensure_directory_exists(self, directory):
+        if directory in self._ensured_dirs:
+            return
+        with self._dir_lock:
+            if directory not in self._ensured_dirs:
+                os.makedirs(directory, exist_ok=True)
+                self._ensured_dirs.add(directory)
+
+    def suggest_filepath(self, url, filename=None, directory=None):
+        """Build a safe target path for a download URL."""
+        target_dir = _abs(directory) if directory else self._abs_default
+        self.ensure_directory_exists(target_dir)
+        return _build_filepath(url, filename, target_dir)
+
+    def delete_file(self, filepath):
+        try:
+            os.remove(filepath)
+        except OSError:
+            return False
+        # The freed blocks change the answer for this directory.
+        self._free_space_cache.pop(os.path.dirname(filepath) or ".", None)
+        return True
+
+    def cleanup_incomplete_download(self, filepath):
+        """Remove the partial file left behind by a failed download."""
+        if os.path.exists(filepath):
+            return self.delete_file(filepath)
+        return False
+
+    def cleanup_incomplete_download_async(self, filepath):
+        """Schedule a cleanup on the pool; returns its Future."""
+        return self._cleanup_pool.submit(
+            self.cleanup_incomplete_download, filepath
+        )
+
+    def cleanup_incomplete_downloads(self, filepaths):
+        """Fan a batch of cleanups across the pool; returns their Futures."""
+        return [
+            self._cleanup_pool.submit(self.cleanup_incomplete_download, fp)
+            for fp in filepaths
+        ]
+
+    def shutdown(self):
+        self._cleanup_pool.shutdown(wait=True)
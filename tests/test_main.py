@@ -0,0 +1,119 @@
+"""Backend API tests.
+
+The whole suite shares one in-memory SQLite database (StaticPool keeps
+the single connection alive so every session sees the same schema) and
+one TestClient, so no test touches the filesystem or pays app startup
+more than once.
+"""
+
+import os
+from unittest import mock
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import api, main, models, security
+from backend.config import settings
+from backend.database import get_db
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine
+)
+models.Base.metadata.create_all(bind=engine)
+
+
+def _override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+main.app.dependency_overrides[get_db] = _override_get_db
+
+
+@pytest.fixture(scope="session")
+def client():
+    settings.ADMIN_PASSWORD_HASH = security.hash_password("testpass")
+    # The broadcast loop must read the same in-memory database.
+    with mock.patch.object(main, "ReadSessionLocal", TestingSessionLocal):
+        with TestClient(main.app) as test_client:
+            yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    response = client.post(
+        "/token", data={"username": "admin", "password": "testpass"}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_login_rejects_bad_password(client):
+    response = client.post(
+        "/token", data={"username": "admin", "password": "nope"}
+    )
+    assert response.status_code == 401
+
+
+def test_clients_requires_auth(client):
+    assert client.get("/api/clients").status_code == 401
+
+
+def test_create_and_list_client(client, auth_headers):
+    with mock.patch.object(api.wg_utils, "add_peer_live") as add_peer, \
+            mock.patch.object(api, "_persist_config_later"):
+        response = client.post(
+            "/api/clients", json={"name": "laptop"}, headers=auth_headers
+        )
+    assert response.status_code == 200
+    created = response.json()
+    assert created["name"] == "laptop"
+    assert created["public_key"]
+    add_peer.assert_called_once()
+
+    listed = client.get("/api/clients", headers=auth_headers).json()
+    assert [c["name"] for c in listed] == ["laptop"]
+    assert listed[0]["is_connected"] is False
+
+
+def test_clients_rejects_bad_pagination(client, auth_headers):
+    response = client.get(
+        "/api/clients", params={"limit": "abc"}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+def test_duplicate_name_conflicts(client, auth_headers):
+    with mock.patch.object(api.wg_utils, "add_peer_live"), \
+            mock.patch.object(api, "_persist_config_later"):
+        response = client.post(
+            "/api/clients", json={"name": "laptop"}, headers=auth_headers
+        )
+    assert response.status_code == 409
+
+
+def test_delete_client(client, auth_headers):
+    listed = client.get("/api/clients", headers=auth_headers).json()
+    client_id = listed[0]["id"]
+    with mock.patch.object(api.wg_utils, "remove_peer_live") as rm, \
+            mock.patch.object(api, "_persist_config_later"):
+        response = client.delete(
+            f"/api/clients/{client_id}", headers=auth_headers
+        )
+    assert response.status_code == 200
+    rm.assert_called_once()
+    assert client.get("/api/clients", headers=auth_headers).json() == []
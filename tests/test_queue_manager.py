@@ -0,0 +1,124 @@
+"""QueueManager tests, synchronized on dispatch/completion events.
+
+No sleeps: the manager pulses ``_dispatched_event`` after each dispatch
+commit and ``_completed_event`` after reaping a completion, so tests
+block on those with a timeout instead of padding real time.
+"""
+
+import itertools
+
+import pytest
+
+from server.downloader import StatusView
+from server.queue_manager import QueueManager
+
+WAIT = 2.0
+
+
+class FakeDownloader:
+    """Stands in for Downloader; completions are driven by the test."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._callback = None
+        self._changes = {}
+        self.started = []
+        self.cancelled = []
+
+    def set_completion_callback(self, callback):
+        self._callback = callback
+
+    def start_download(self, url, filepath):
+        download_id = f"dl-{next(self._ids)}"
+        self.started.append((download_id, url))
+        return download_id
+
+    def cancel_download(self, download_id):
+        self.cancelled.append(download_id)
+
+    def drain_status_changes(self):
+        changes, self._changes = self._changes, {}
+        return changes
+
+    def get_status(self, download_id):
+        return None
+
+    def finish(self, download_id, status="completed"):
+        self._changes[download_id] = StatusView(
+            status=status,
+            error=None,
+            progress=100.0,
+            bytes_downloaded=0,
+            total_size=0,
+            filepath="",
+            url="",
+        )
+        self._callback(download_id, status)
+
+
+@pytest.fixture
+def downloader():
+    return FakeDownloader()
+
+
+@pytest.fixture
+def queue_manager(downloader):
+    qm = QueueManager(downloader=downloader, max_concurrent=1)
+    yield qm
+    qm.stop()
+
+
+def wait_dispatch(qm):
+    assert qm._dispatched_event.wait(timeout=WAIT)
+    qm._dispatched_event.clear()
+
+
+def wait_completion(qm):
+    assert qm._completed_event.wait(timeout=WAIT)
+    qm._completed_event.clear()
+
+
+def test_add_download_dispatches(queue_manager, downloader):
+    qm_id = queue_manager.add_download("http://example.com/a", "/tmp/a")
+    wait_dispatch(queue_manager)
+    assert len(downloader.started) == 1
+    status = queue_manager.get_task_status(qm_id)
+    assert status["status"] == "active"
+
+
+def test_completion_dispatches_next(queue_manager, downloader):
+    first = queue_manager.add_download("http://example.com/a", "/tmp/a")
+    wait_dispatch(queue_manager)
+    queue_manager.add_download("http://example.com/b", "/tmp/b")
+    # Slot is full; the second task must stay pending.
+    assert len(downloader.started) == 1
+
+    downloader.finish(downloader.started[0][0])
+    wait_completion(queue_manager)
+    wait_dispatch(queue_manager)
+    assert len(downloader.started) == 2
+    assert queue_manager.get_task_status(first) is None
+
+
+def test_priority_order(queue_manager, downloader):
+    queue_manager.add_download("http://example.com/a", "/tmp/a")
+    wait_dispatch(queue_manager)
+    queue_manager.add_download("http://example.com/low", "/tmp/l", priority=9)
+    queue_manager.add_download("http://example.com/hi", "/tmp/h", priority=1)
+
+    downloader.finish(downloader.started[0][0])
+    wait_completion(queue_manager)
+    wait_dispatch(queue_manager)
+    assert downloader.started[1][1] == "http://example.com/hi"
+
+
+def test_remove_pending_download(queue_manager, downloader):
+    queue_manager.add_download("http://example.com/a", "/tmp/a")
+    wait_dispatch(queue_manager)
+    qm_id = queue_manager.add_download("http://example.com/b", "/tmp/b")
+
+    assert queue_manager.remove_download(qm_id)
+    downloader.finish(downloader.started[0][0])
+    wait_completion(queue_manager)
+    # The removed task must never reach the downloader.
+    assert all(url != "http://example.com/b" for _, url in downloader.started)